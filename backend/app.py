@@ -1,10 +1,13 @@
 import os
-import json
-import tempfile
-import numpy as np
+from datetime import datetime
+from functools import lru_cache
+import orjson
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
+from flask_compress import Compress
 from flask_cors import CORS
 from flask_migrate import Migrate
+from sqlalchemy import insert, select, tuple_
 from sqlalchemy.exc import IntegrityError
 
 # モデルとDBインスタンスをインポート
@@ -13,7 +16,8 @@ from models import db, Telegram
 from parser import TelegramParser
 
 app = Flask(__name__)
-CORS(app)
+# 一覧APIのページング用カーソルはヘッダーで返すため、ブラウザから参照できるよう公開する
+CORS(app, expose_headers=['X-Next-Before', 'X-Next-Before-Id'])
 
 # --- 設定 ---
 DB_USER = os.environ.get('DB_USER', 'user')
@@ -21,54 +25,59 @@ DB_PASSWORD = os.environ.get('DB_PASSWORD', 'userpassword')
 DB_HOST = os.environ.get('DB_HOST', 'db')
 DB_NAME = os.environ.get('DB_NAME', 'drug_order_db')
 
-# SQLAlchemy設定 (mysql-connector-pythonを使用)
-app.config['SQLALCHEMY_DATABASE_URI'] = f'mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}'
+# SQLAlchemy設定 (gevent環境で協調動作するピュアPythonドライバ PyMySQL を使用)
+app.config['SQLALCHEMY_DATABASE_URI'] = f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    # コネクションプール (リクエスト毎の接続・認証を避けて接続を再利用する)
+    'pool_size': int(os.environ.get('DB_POOL_SIZE', 8)),
+    'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 8)),
+    # MySQL の wait_timeout により切断された接続を使わないよう定期的に張り直す
+    'pool_recycle': 3600,
+}
+# アップロードサイズの上限 (デフォルト: 16MB)
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
+
+# レスポンス圧縮 (詳細APIの raw_data など大きなJSONを圧縮して返す)
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 1024
+app.config['COMPRESS_LEVEL'] = 4
+app.config['COMPRESS_BR_LEVEL'] = 4
 
 # DBとMigrateの初期化
 db.init_app(app)
 migrate = Migrate(app, db)
+Compress(app)
 
-# --- ヘルパー: Numpy対応JSONエンコーダ ---
-class NumpyJSONEncoder(json.JSONEncoder):
-    """
-    parser.py が返すデータに含まれる np.nan などを
-    JSON規格(null)に変換するためのエンコーダ
-    """
-    def default(self, obj):
-        if isinstance(obj, float) and np.isnan(obj):
-            return None
-        if isinstance(obj, np.integer):
-            return int(obj)
-        if isinstance(obj, np.floating):
-            return float(obj)
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return super().default(obj)
-
-app.json_encoder = NumpyJSONEncoder
-
-def clean_numpy_data(data):
+# --- ヘルパー: orjsonによるJSON処理 ---
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+def orjson_dumps(obj):
+    """共通オプションで orjson シリアライズを行い bytes を返す"""
+    return orjson.dumps(obj, option=ORJSON_OPTIONS)
+
+class OrjsonProvider(JSONProvider):
     """
-    Numpy型を含む辞書を標準的なPython型(JSON化可能)な辞書に変換する。
-    SQLAlchemy経由でMySQLに保存する際、NaNが含まれているとエラーになるため
-    ここで None (null) に変換を行う。
+    jsonify / app.json を orjson で処理するための JSONProvider
     """
-    # 1. まずNumpy型を標準型へダンプ (この時点で np.nan は "NaN" という文字列リテラルになる)
-    json_str = json.dumps(data, cls=NumpyJSONEncoder)
+    def dumps(self, obj, **kwargs):
+        return orjson_dumps(obj).decode()
 
-    # 2. JSON文字列を辞書に戻す際、parse_constantフックを使って "NaN" を None に変換する
-    return json.loads(json_str, parse_constant=lambda x: None if x == 'NaN' else float(x))
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
-def save_parsed_data(parsed_data):
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson_dumps(obj), mimetype='application/json')
+
+app.json = OrjsonProvider(app)
+
+def build_telegram_values(parsed_data):
     """
-    解析済みの辞書データをDBに保存する共通関数
-    
+    解析済みの辞書データから telegrams テーブルのカラム値を組み立てる
+
     Returns:
-        Telegram: 保存されたモデルインスタンス
-    Raises:
-        IntegrityError: 重複データが存在する場合
-        Exception: その他のDBエラー
+        dict: カラム名をキーとする辞書
     """
     # 3. 必要な情報を抽出
     content = parsed_data.get('content', {})
@@ -80,27 +89,115 @@ def save_parsed_data(parsed_data):
     order_date_obj = order_info.get('sakusei_datetime', {})
     order_date = order_date_obj.get('date') if isinstance(order_date_obj, dict) else None
 
+    # シリアライズは1回だけ行い、圧縮したバイト列として保存する
+    raw_data_json = orjson_dumps(parsed_data)
+
+    return {
+        "doc_id": order_info.get('doc_id'),
+        "version": order_info.get('version'),
+        "patient_id": patient_info.get('id'),
+        "patient_name": patient_info.get('kanji_name'),
+        "order_number": order_info.get('number'),
+        "order_date": order_date,
+        "raw_data": Telegram.compress_raw_data(raw_data_json)
+    }
+
+def telegram_exists(doc_id, version):
+    """同じ文書番号・版数の電文が登録済みかを EXISTS で確認する"""
+    return db.session.execute(
+        select(
+            select(1).where(Telegram.doc_id == doc_id, Telegram.version == version).exists()
+        )
+    ).scalar()
+
+def save_parsed_data(parsed_data):
+    """
+    解析済みの辞書データをDBに保存する共通関数
+    
+    Returns:
+        Telegram: 保存されたモデルインスタンス
+    Raises:
+        IntegrityError: 重複データが存在する場合
+        Exception: その他のDBエラー
+    """
     # 4. モデル作成と保存
-    # JSON型カラムに入れるためにデータをクリーンアップ
-    cleaned_data = clean_numpy_data(parsed_data)
-
-    new_telegram = Telegram(
-        doc_id=order_info.get('doc_id'),
-        version=order_info.get('version'),
-        patient_id=patient_info.get('id'),
-        patient_name=patient_info.get('kanji_name'),
-        order_number=order_info.get('number'),
-        order_date=order_date,
-        raw_data=cleaned_data
-    )
+    new_telegram = Telegram(**build_telegram_values(parsed_data))
 
     db.session.add(new_telegram)
     db.session.commit()
     
     return new_telegram
 
+def save_parsed_data_bulk(parsed_list):
+    """
+    複数の解析済みデータを1回の一括INSERTで保存する
+    登録済みの電文 (doc_id + version が一致するもの) とリクエスト内で重複する電文は保存せずにスキップする
+
+    Returns:
+        list: parsed_list の各要素を保存したか (True) スキップしたか (False)
+    Raises:
+        IntegrityError: 確認後に別のリクエストで同じ電文が登録された場合 (全件ロールバック対象)
+        Exception: その他のDBエラー
+    """
+    keys = []
+    for parsed_data in parsed_list:
+        order_info = parsed_data.get('content', {}).get('order_info', {})
+        keys.append((order_info.get('doc_id'), order_info.get('version')))
+
+    # 登録済みの (doc_id, version) を1回のクエリでまとめて確認する
+    existing = set()
+    if keys:
+        existing = {
+            tuple(r) for r in db.session.execute(
+                select(Telegram.doc_id, Telegram.version)
+                .where(tuple_(Telegram.doc_id, Telegram.version).in_(set(keys)))
+            )
+        }
+
+    saved = []
+    rows = []
+    for key, parsed_data in zip(keys, parsed_list):
+        if key in existing:
+            saved.append(False)
+            continue
+        existing.add(key)
+        saved.append(True)
+        rows.append(build_telegram_values(parsed_data))
+
+    # executemany 形式で渡すと、ドライバの executemany により複数行VALUESのINSERTとしてまとめて送信される
+    if rows:
+        db.session.execute(insert(Telegram), rows)
+    db.session.commit()
+
+    return saved
+
 # --- APIエンドポイント ---
 
+# 詳細APIのレスポンスをプロセス内にキャッシュする件数
+DETAIL_CACHE_SIZE = int(os.environ.get('DETAIL_CACHE_SIZE', 1024))
+
+# 一覧APIの取得件数
+LIST_DEFAULT_LIMIT = 100
+LIST_MAX_LIMIT = 1000
+
+# 一覧・検索で返すカラム (raw_data のような大きなカラムは含めない)
+LIST_COLUMNS = (
+    Telegram.id_.label('id'),
+    Telegram.doc_id,
+    Telegram.version,
+    Telegram.patient_id,
+    Telegram.patient_name,
+    Telegram.order_number,
+    Telegram.order_date,
+    Telegram.created_at,
+)
+
+# 詳細APIで返すカラム (一覧の項目に更新日時と raw_data を加える)
+DETAIL_COLUMNS = LIST_COLUMNS + (
+    Telegram.updated_at,
+    Telegram.raw_data,
+)
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "ok", "message": "Backend is running with ORM"})
@@ -118,10 +215,14 @@ def receive_telegram():
         return jsonify({"error": "No data received"}), 400
 
     try:
+        # 0. 重複チェック (ヘッダーの文書番号・版数のみで判定し、重複時は解析を省略)
+        doc_id, version = TelegramParser.peek_header(raw_bytes, encoding='cp932')
+        if doc_id is not None and telegram_exists(doc_id, version):
+            return jsonify({"error": "Conflict: This telegram already exists."}), 409
+
         # 1. 解析実行 (バイト列を直接渡す)
         # 改修後のTelegramParserはbytesを受け取れる想定
-        parser = TelegramParser(raw_bytes, encoding='cp932')
-        parsed_data = parser.parse()
+        parsed_data = TelegramParser(encoding='cp932').parse_bytes(raw_bytes)
 
         # 2. DB保存 (共通関数を使用)
         new_telegram = save_parsed_data(parsed_data)
@@ -148,6 +249,48 @@ def receive_telegram():
         print(f"Error processing telegram: {e}")
         return jsonify({"error": "Internal Server Error"}), 500
 
+@app.route('/api/telegrams/receive_bulk', methods=['POST'])
+def receive_telegrams_bulk():
+    """
+    システム連携用: 複数の電文ファイルを multipart (フィールド名 'file' の繰り返し) で受信し、
+    まとめて解析・一括保存するエンドポイント (再送・キャッチアップ用)
+    """
+    files = request.files.getlist('file')
+    if not files:
+        return jsonify({"error": "No file part"}), 400
+
+    # 1つのパーサーを使い回して全ファイルを解析する
+    parser = TelegramParser(encoding='cp932')
+    parsed_list = []
+    for file in files:
+        try:
+            parsed_list.append(parser.parse_bytes(file.read()))
+        except ValueError as ve:
+            return jsonify({"error": f"Validation Error ({file.filename}): {str(ve)}"}), 400
+        except Exception as e:
+            print(f"Error processing telegram ({file.filename}): {e}")
+            return jsonify({"error": f"Internal Server Error ({file.filename})"}), 500
+
+    try:
+        # 登録済みの電文はスキップし、残りを保存する (再送で既存データと重なっても失敗させない)
+        saved = save_parsed_data_bulk(parsed_list)
+
+        return jsonify({
+            "message": "Telegrams received and saved successfully",
+            "count": saved.count(True),
+            "skipped": [file.filename for file, ok in zip(files, saved) if not ok]
+        }), 201
+
+    except IntegrityError:
+        # 確認後に別のリクエストで同じ電文が登録された場合は全件を取り消す
+        db.session.rollback()
+        return jsonify({"error": "Conflict: One or more telegrams were registered concurrently. Please retry."}), 409
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error processing telegrams: {e}")
+        return jsonify({"error": "Internal Server Error"}), 500
+
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
     """
@@ -161,18 +304,11 @@ def upload_file():
     if file.filename == '':
         return jsonify({"error": "No selected file"}), 400
 
-    temp_path = None
     try:
-        # 1. 一時ファイルとして保存
-        with tempfile.NamedTemporaryFile(delete=False) as temp:
-            file.save(temp.name)
-            temp_path = temp.name
-
-        # 2. 解析実行 (ファイルパスを渡す)
-        parser = TelegramParser(temp_path, encoding='cp932')
-        parsed_data = parser.parse()
+        # 1. 解析実行 (一時ファイルを経由せず、受信したバイト列を直接渡す)
+        parsed_data = TelegramParser(encoding='cp932').parse_bytes(file.read())
 
-        # 3. DB保存 (共通関数を使用)
+        # 2. DB保存 (共通関数を使用)
         new_telegram = save_parsed_data(parsed_data)
 
         return jsonify({
@@ -181,6 +317,11 @@ def upload_file():
             "patient_name": new_telegram.patient_name
         }), 201
     
+    except ValueError as ve:
+        # 解析エラー (フォーマット不正など)
+        db.session.rollback()
+        return jsonify({"error": f"Validation Error: {str(ve)}"}), 400
+
     except IntegrityError:
         db.session.rollback()
         return jsonify({"error": "この電文は既に登録されています。"}), 409
@@ -189,9 +330,6 @@ def upload_file():
         print(f"Error processing file: {e}")
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            os.remove(temp_path)
 
 @app.route('/api/telegrams/search', methods=['GET'])
 def search_telegrams():
@@ -207,26 +345,15 @@ def search_telegrams():
     try:
         # DBはInteger定義なので型変換して検索
         # 完全一致検索
-        telegrams = Telegram.query.filter_by(
-            order_number=int(order_number),
-            version=int(version)
-        ).order_by(Telegram.created_at.desc()).all()
-        
-        # 一覧用にデータを整形
-        results = []
-        for t in telegrams:
-            results.append({
-                "id": t.id_,
-                "doc_id": t.doc_id,
-                "version": t.version,
-                "patient_id": t.patient_id,
-                "patient_name": t.patient_name,
-                "order_number": t.order_number,
-                "order_date": t.order_date,
-                "created_at": t.created_at
-            })
-
-        return jsonify(results)
+        # ORMインスタンスを生成せず、必要なカラムだけを RowMapping で受け取る
+        rows = db.session.execute(
+            select(*LIST_COLUMNS).where(
+                Telegram.order_number == int(order_number),
+                Telegram.version == int(version)
+            ).order_by(Telegram.created_at.desc())
+        ).mappings().all()
+
+        return jsonify([dict(r) for r in rows])
     
     except ValueError:
         # 数値変換に失敗した場合などは空リストを返す（あるいはエラーでもよい）
@@ -238,41 +365,101 @@ def search_telegrams():
 def get_telegrams():
     """
     保存された電文リストを取得する
+    (created_at, id) をカーソルとしたキーセットページネーションで最大 limit 件を返す。
+
+    Query Parameters:
+        before (str): この作成日時 (ISO 8601) より前の電文を返す
+        before_id (int): before と同時刻の電文について、このIDより小さいものを返す (before と併せて指定する)
+        limit (int): 取得件数 (デフォルト: 100, 最大: 1000)
+
+    次ページがある場合、次のカーソルを X-Next-Before / X-Next-Before-Id ヘッダーで返す。
     """
     try:
-        # 作成日時の降順で取得
-        telegrams = Telegram.query.order_by(Telegram.created_at.desc()).all()
+        limit = min(int(request.args.get('limit', LIST_DEFAULT_LIMIT)), LIST_MAX_LIMIT)
+        before = request.args.get('before')
+        before_id = request.args.get('before_id')
+        before = datetime.fromisoformat(before) if before else None
+        before_id = int(before_id) if before_id else None
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        if before_id is not None and before is None:
+            # before_id は before と組み合わせたカーソルとしてのみ有効
+            raise ValueError("before_id requires before")
+    except ValueError:
+        return jsonify({"error": "Invalid parameters (before, before_id, limit)"}), 400
+
+    try:
+        # 作成日時の降順で取得 (raw_data は読み込まず、ORMインスタンスも生成しない)
+        stmt = select(*LIST_COLUMNS) \
+            .order_by(Telegram.created_at.desc(), Telegram.id_.desc()) \
+            .limit(limit)
+        if before is not None and before_id is not None:
+            stmt = stmt.where(tuple_(Telegram.created_at, Telegram.id_) < (before, before_id))
+        elif before is not None:
+            stmt = stmt.where(Telegram.created_at < before)
+
+        rows = db.session.execute(stmt).mappings().all()
 
         # 一覧用に軽量なデータを返す
-        results = []
-        for t in telegrams:
-            results.append({
-                "id": t.id_,
-                "doc_id": t.doc_id,
-                "version": t.version,
-                "patient_id": t.patient_id,
-                "patient_name": t.patient_name,
-                "order_number": t.order_number,
-                "order_date": t.order_date,
-                "created_at": t.created_at
-            })
-
-        return jsonify(results)
+        response = jsonify([dict(r) for r in rows])
+        if len(rows) == limit:
+            last = rows[-1]
+            response.headers['X-Next-Before'] = last['created_at'].isoformat()
+            response.headers['X-Next-Before-Id'] = str(last['id'])
+        return response
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _etag_matches(etag):
+    """
+    If-None-Match が ETag に一致するかを判定する。
+    Flask-Compress は圧縮時に ETag の末尾へ ":br" などを付与するため、その形式も一致とみなす。
+    """
+    candidates = [etag] + [f"{etag}:{algo}" for algo in app.config['COMPRESS_ALGORITHM']]
+    return any(request.if_none_match.contains(c) for c in candidates)
+
+@lru_cache(maxsize=DETAIL_CACHE_SIZE)
+def _render_detail(telegram_id, updated_at_iso):
+    """
+    詳細APIのレスポンスボディ (JSONバイト列) を生成する。
+    updated_at をキーに含めてキャッシュするため、行が更新されれば自然に別エントリとなる。
+    """
+    # ORMインスタンスを生成せず、必要なカラムだけを RowMapping で受け取る
+    row = db.session.execute(
+        select(*DETAIL_COLUMNS).where(Telegram.id_ == telegram_id)
+    ).mappings().one()
+
+    # 展開したJSONバイト列を再エンコードせずに埋め込む (raw_data が NULL の行は null を返す)
+    result = dict(row)
+    raw_data_json = Telegram.decompress_raw_data(row['raw_data'])
+    result['raw_data'] = orjson.Fragment(raw_data_json) if raw_data_json is not None else None
+    return orjson_dumps(result)
+
 @app.route('/api/telegrams/<string:telegram_id>', methods=['GET'])
 def get_telegram_detail(telegram_id):
     """
     特定の電文の詳細を取得する
+    登録後の電文は更新されないため、updated_at を ETag として条件付きGETに対応する
     """
     try:
-        telegram = db.session.get(Telegram, telegram_id)
-        if not telegram:
+        # まずは軽量なカラムのみで存在確認と ETag の算出を行う
+        row = db.session.execute(
+            select(Telegram.id_, Telegram.updated_at).where(Telegram.id_ == telegram_id)
+        ).first()
+        if not row:
              return jsonify({"error": "Not found"}), 404
 
-        # to_dict() ヘルパーを使用
-        return jsonify(telegram.to_dict())
+        updated_at_iso = row.updated_at.isoformat() if row.updated_at else ''
+        etag = f"{row.id_}-{updated_at_iso}"
+        if _etag_matches(etag):
+            response = app.response_class(status=304)
+        else:
+            body = _render_detail(row.id_, updated_at_iso)
+            response = app.response_class(body, mimetype='application/json')
+
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        return response
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
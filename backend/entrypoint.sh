@@ -0,0 +1,8 @@
+#!/bin/sh
+set -e
+
+# ワーカー起動前に一度だけDBマイグレーションを適用する
+# (各ワーカーの起動時にDDLを発行しないよう、スキーマ管理はここに集約する)
+flask db upgrade
+
+exec "$@"
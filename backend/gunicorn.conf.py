@@ -0,0 +1,17 @@
+import multiprocessing
+import os
+
+# gunicorn 設定 (本番用)
+bind = '0.0.0.0:5000'
+
+# gevent ワーカー: 1ワーカーあたり worker_connections 本の接続を協調的に処理する
+# (起動時に monkey patch が適用され、PyMySQL のソケットI/O も非ブロッキングになる)
+worker_class = 'gevent'
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# 大きな電文アップロードを考慮したタイムアウト
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+
+accesslog = '-'
+errorlog = '-'
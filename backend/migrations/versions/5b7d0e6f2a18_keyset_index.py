@@ -0,0 +1,28 @@
+"""replace created_at index with (created_at, id_)
+
+Revision ID: 5b7d0e6f2a18
+Revises: c4a9e1f03d62
+Create Date: 2026-10-14 14:41:09.553002
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7d0e6f2a18'
+down_revision = 'c4a9e1f03d62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('telegrams', schema=None) as batch_op:
+        batch_op.drop_index('ix_telegrams_created_at')
+        batch_op.create_index('ix_telegrams_created_at_id', [sa.text('created_at DESC'), sa.text('id_ DESC')], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('telegrams', schema=None) as batch_op:
+        batch_op.drop_index('ix_telegrams_created_at_id')
+        batch_op.create_index('ix_telegrams_created_at', [sa.text('created_at DESC')], unique=False)
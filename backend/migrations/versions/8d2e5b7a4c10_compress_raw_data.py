@@ -0,0 +1,75 @@
+"""compress raw_data
+
+Revision ID: 8d2e5b7a4c10
+Revises: a61e3c9d7f25
+Create Date: 2026-10-14 11:24:37.902115
+
+"""
+import zlib
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2e5b7a4c10'
+down_revision = 'a61e3c9d7f25'
+branch_labels = None
+depends_on = None
+
+# 移行時に1回で読み込む行数 (大きなカラムを全件メモリに載せないよう分割する)
+BATCH_SIZE = 500
+
+
+def _convert_in_batches(conn, convert):
+    """id_ 順に BATCH_SIZE 件ずつ raw_data を変換して書き戻す"""
+    telegrams = sa.table(
+        'telegrams',
+        sa.column('id_', sa.Integer()),
+        sa.column('raw_data', sa.LargeBinary()),
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(telegrams.c.id_, telegrams.c.raw_data)
+            .where(telegrams.c.id_ > last_id)
+            .order_by(telegrams.c.id_)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        params = [
+            {'b_id': id_, 'b_value': convert(raw_data)}
+            for id_, raw_data in rows if raw_data is not None
+        ]
+        if params:
+            conn.execute(
+                telegrams.update()
+                .where(telegrams.c.id_ == sa.bindparam('b_id'))
+                .values(raw_data=sa.bindparam('b_value')),
+                params
+            )
+
+
+def upgrade():
+    # シリアライズ済みのJSONバイト列をその場で zlib 圧縮する
+    _convert_in_batches(op.get_bind(), zlib.compress)
+
+    with op.batch_alter_table('telegrams', schema=None) as batch_op:
+        batch_op.alter_column('raw_data',
+               existing_type=sa.LargeBinary(length=16777215),
+               existing_nullable=True,
+               comment='Parsed Raw JSON Data (zlib)',
+               existing_comment='Parsed Raw JSON Data')
+
+
+def downgrade():
+    with op.batch_alter_table('telegrams', schema=None) as batch_op:
+        batch_op.alter_column('raw_data',
+               existing_type=sa.LargeBinary(length=16777215),
+               existing_nullable=True,
+               comment='Parsed Raw JSON Data',
+               existing_comment='Parsed Raw JSON Data (zlib)')
+
+    _convert_in_batches(op.get_bind(), zlib.decompress)
@@ -0,0 +1,92 @@
+"""store raw_data as serialized JSON bytes
+
+Revision ID: a61e3c9d7f25
+Revises: 0949e96cb3ca
+Create Date: 2026-10-14 10:02:11.418263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import orjson
+
+
+# revision identifiers, used by Alembic.
+revision = 'a61e3c9d7f25'
+down_revision = '0949e96cb3ca'
+branch_labels = None
+depends_on = None
+
+# 移行時に1回で読み込む行数 (大きなカラムを全件メモリに載せないよう分割する)
+BATCH_SIZE = 500
+
+
+def _copy_in_batches(conn, telegrams, src, dst, convert):
+    """id_ 順に BATCH_SIZE 件ずつ src カラムを変換して dst カラムへ書き込む"""
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(telegrams.c.id_, src)
+            .where(telegrams.c.id_ > last_id)
+            .order_by(telegrams.c.id_)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        params = [
+            {'b_id': id_, 'b_value': convert(value)}
+            for id_, value in rows if value is not None
+        ]
+        if params:
+            conn.execute(
+                telegrams.update()
+                .where(telegrams.c.id_ == sa.bindparam('b_id'))
+                .values({dst: sa.bindparam('b_value')}),
+                params
+            )
+
+
+def upgrade():
+    with op.batch_alter_table('telegrams', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('raw_data_bin', sa.LargeBinary(length=16777215), nullable=True, comment='Parsed Raw JSON Data'))
+
+    # JSON カラムの内容をシリアライズしたバイト列に移し替える
+    telegrams = sa.table(
+        'telegrams',
+        sa.column('id_', sa.Integer()),
+        sa.column('raw_data', sa.JSON()),
+        sa.column('raw_data_bin', sa.LargeBinary()),
+    )
+    _copy_in_batches(op.get_bind(), telegrams, telegrams.c.raw_data, 'raw_data_bin', orjson.dumps)
+
+    with op.batch_alter_table('telegrams', schema=None) as batch_op:
+        batch_op.drop_column('raw_data')
+        batch_op.alter_column('raw_data_bin',
+               new_column_name='raw_data',
+               existing_type=sa.LargeBinary(length=16777215),
+               existing_nullable=True,
+               existing_comment='Parsed Raw JSON Data')
+
+
+def downgrade():
+    with op.batch_alter_table('telegrams', schema=None) as batch_op:
+        batch_op.alter_column('raw_data',
+               new_column_name='raw_data_bin',
+               existing_type=sa.LargeBinary(length=16777215),
+               existing_nullable=True,
+               existing_comment='Parsed Raw JSON Data')
+
+    with op.batch_alter_table('telegrams', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('raw_data', sa.JSON(), nullable=True, comment='Parsed Raw JSON Data'))
+
+    telegrams = sa.table(
+        'telegrams',
+        sa.column('id_', sa.Integer()),
+        sa.column('raw_data', sa.JSON()),
+        sa.column('raw_data_bin', sa.LargeBinary()),
+    )
+    _copy_in_batches(op.get_bind(), telegrams, telegrams.c.raw_data_bin, 'raw_data', orjson.loads)
+
+    with op.batch_alter_table('telegrams', schema=None) as batch_op:
+        batch_op.drop_column('raw_data_bin')
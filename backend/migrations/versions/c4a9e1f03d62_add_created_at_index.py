@@ -0,0 +1,26 @@
+"""add created_at index
+
+Revision ID: c4a9e1f03d62
+Revises: 8d2e5b7a4c10
+Create Date: 2026-10-14 13:05:48.211734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a9e1f03d62'
+down_revision = '8d2e5b7a4c10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('telegrams', schema=None) as batch_op:
+        batch_op.create_index('ix_telegrams_created_at', [sa.text('created_at DESC')], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('telegrams', schema=None) as batch_op:
+        batch_op.drop_index('ix_telegrams_created_at')
@@ -1,5 +1,7 @@
+import zlib
+import orjson
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary
 from datetime import datetime
 
 # dbインスタンスの作成
@@ -16,10 +18,6 @@ class Telegram(db.Model):
     doc_id = Column(String(30), comment='doc_id')
     # content.order_info.version からセット
     version = Column(Integer, comment='version')
-    # 複合ユニークキー
-    __table_args__ = (
-        db.UniqueConstraint('doc_id', 'version', name='uix_doc_id_version'),
-    )
     # content.patient_info.id からセット
     patient_id = Column(String(20), index=True, comment='Patient ID')
     # content.patient_info.kanji_name からセット
@@ -29,18 +27,36 @@ class Telegram(db.Model):
     # content.order_info.sakusei_datetime.date からセット
     order_date = Column(String(20), comment='Order Date (YYYYMMDD)')
 
-    # 解析した全データをJSONとして保存
-    raw_data = Column(JSON, comment='Parsed Raw JSON Data')
+    # 解析した全データをJSONバイト列にシリアライズし、zlib圧縮して保存 (MySQLではMEDIUMBLOB)
+    raw_data = Column(LargeBinary(length=16777215), comment='Parsed Raw JSON Data (zlib)')
 
     created_at = Column(DateTime, default=datetime.now, comment='Created At')
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, comment='Updated At')
 
+    __table_args__ = (
+        # 複合ユニークキー
+        db.UniqueConstraint('doc_id', 'version', name='uix_doc_id_version'),
+        # 一覧取得 (作成日時の降順・キーセットページネーション) 用
+        db.Index('ix_telegrams_created_at_id', created_at.desc(), id_.desc()),
+    )
+
     # Pythonの予約語id()と衝突しないようにするためのgetter
     def get_id(self):
         return self.id_
 
+    @staticmethod
+    def compress_raw_data(raw_data_json):
+        """シリアライズ済みJSONバイト列を raw_data カラム用に圧縮する"""
+        return zlib.compress(raw_data_json)
+
+    @staticmethod
+    def decompress_raw_data(raw_data):
+        """raw_data カラムの値を展開してJSONバイト列に戻す"""
+        return zlib.decompress(raw_data) if raw_data is not None else None
+
     def to_dict(self):
         """APIレスポンス用辞書変換"""
+        raw_data_json = self.decompress_raw_data(self.raw_data)
         return {
             'id': self.id_,
             'doc_id': self.doc_id,
@@ -49,6 +65,6 @@ class Telegram(db.Model):
             'patient_name': self.patient_name,
             'order_number': self.order_number,
             'order_date': self.order_date,
-            'raw_data': self.raw_data,
+            'raw_data': orjson.loads(raw_data_json) if raw_data_json is not None else None,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
\ No newline at end of file
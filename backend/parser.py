@@ -1,15 +1,261 @@
-import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from operator import itemgetter
+import logging
+import mmap
 import os
+import struct
+import sys
+
+logger = logging.getLogger(__name__)
+
+# parse_many のワーカープロセス毎に使い回すパーサー (_parse_one で作成する)
+_worker_parser = None
+
+# --- 電文レイアウト定義 ---
+# 各項目は (キー, バイト数[, 型]) で表す。バイト数の代わりに項目のタプルを渡すと入れ子のグループになる。
+# 型: 'str' (デフォルト) / 'int' (数値化) / 'float' (実数化。空欄はNone) / 'count' (繰り返し数。空欄は0)
+#     'enum' (値の種類が少ない区分項目。文字列を intern して使い回す)
+
+# 共通部 (64バイト)
+COMMON_SCHEMA = (
+    ("message_type", 2, 'enum'),        # 05 電文種別
+    ("record_continuation", 1, 'enum'), # 05 レコード継続指示
+    ("destination_system_code", 2, 'enum'), # 05 送信先システムコード
+    ("source_system_code", 2, 'enum'),  # 05 発信元システムコード
+    ("processing_info", (              # 05 処理情報
+        ("date", 8),                   # 07 処理年月日
+        ("time", 6),                   # 07 処理時刻
+    )),
+    ("client_name", 8),                # 05 端末名
+    ("d_id", 8),                       # 05 利用者番号
+    ("processing_class", 2, 'enum'),    # 05 処理区分
+    ("response_type", 2, 'enum'),       # 05 応答種別
+    ("message_length", 6),             # 05 電文長
+    ("error_code", 5),                 # 05 エラーコード
+    ("reserve", 12),                   # 05 予備
+)
+
+# 内容部の先頭 (患者情報 〜 プロファイル数 までの固定長部分)
+CONTENT_HEAD_SCHEMA = (
+    ("patient_info", (                 # 05 患者情報
+        ("id", 10),                    # 07 患者番号 / 患者ID
+        ("kanji_name", 30),            # 07 患者漢字氏名
+        ("kana_name", 60),             # 07 患者カナ氏名
+        ("sex", 1, 'enum'),             # 07 患者性別
+        ("birthdate", 8),              # 07 患者生年月日
+        ("postal_code_1", 3),          # 07 郵便番号1
+        ("postal_code_2", 4),          # 07 郵便番号2
+        ("address", 100),              # 07 患者住所
+        ("phone_number", 15),          # 07 電話番号
+    )),
+    ("inpatient_info", (               # 05 入院情報
+        ("status", 1, 'enum'),          # 07 入外状態
+        ("dept_code", 3),              # 07 入院診療科コード
+        ("ward_code", 3),              # 07 入院中病棟コード
+        ("room_code", 5),              # 07 入院中部屋コード
+        ("bed_code", 2),               # 07 入院中ベッドコード
+    )),
+    ("order_info", (                   # 05 オーダ情報
+        ("doc_type", 1, 'enum'),        # 07 文書種別
+        ("doc_id", 30),                # 07 文書番号
+        ("version", 2, 'int'),         # 07 版数
+        ("parent_doc_id", 30),         # 07 親文書番号
+        ("number", 8),                 # 07 オーダ番号
+        ("related_order_info", (       # 07 関連オーダ番号情報
+            ("date", 8),               # 09 関連オーダ作成日
+            ("number", 8),             # 09 関連オーダ番号
+        )),
+        ("jisshi_datetime", (          # 07 実施日時
+            ("date", 8),               # 09 実施日付
+            ("time", 6),               # 09 実施時間
+        )),
+        ("sakusei_datetime", (         # 07 オーダ作成日
+            ("date", 8),               # 09 オーダ日付
+            ("time", 6),               # 09 オーダ時間
+        )),
+        ("hikikaeken_no", 8),          # 07 薬引換券番号
+        ("inpatient_status", 1, 'enum'), # 07 入外区分
+        ("hakkou_dept_code", 3),       # 07 オーダ発行診療科コード
+        ("hakkou_ward_code", 3),       # 07 オーダ発行病棟コード
+        ("denpyo_code", 4),            # 07 伝票コード
+        ("denpyo_name", 50),           # 07 伝票名称
+        ("doctor_info", (              # 07 依頼医情報
+            ("d_id", 8),               # 09 依頼医番号
+            ("kanji_name", 20),        # 09 依頼医名
+            ("kana_name", 40),         # 09 依頼医カナ名
+        )),
+        ("daikoh_info", (              # 07 代行利用者情報
+            ("d_id", 8),               # 09 代行利用者番号
+            ("kanji_name", 20),        # 09 代行利用者名
+        )),
+        ("mayaku_shiyosha_1", (        # 07 麻薬施用者情報1
+            ("id", 10),                # 09 麻薬施用者番号1
+            ("start_date", 8),         # 09 開始日
+            ("end_date", 8),           # 09 終了日
+        )),
+        ("mayaku_shiyosha_2", (        # 07 麻薬施用者情報2
+            ("id", 10),                # 09 麻薬施用者番号2
+            ("start_date", 8),         # 09 開始日
+            ("end_date", 8),           # 09 終了日
+        )),
+    )),
+    ("patient_profile", (              # 05 患者プロファイル情報
+        ("height", (                   # 07 身長
+            ("value", 11, 'float'),    # 09 身長値
+            ("date", 8),               # 09 身長計測日
+        )),
+        ("weight", (                   # 07 体重
+            ("value", 11, 'float'),    # 09 体重値
+            ("date", 8),               # 09 体重計測日
+        )),
+        ("bsa", (                      # 07 体表面積 body surface area
+            ("value", 11, 'float'),    # 09 体表面積値
+        )),
+        ("profile_info", (             # 07 プロファイル情報
+            ("profile_count", 3, 'count'),  # 09 プロファイル数
+        )),
+    )),
+)
+
+# プロファイル情報 (1件分。プロファイル数だけ繰り返す)
+PROFILE_SCHEMA = (
+    ("code", 10),                      # 11 プロファイルコード
+    ("name", 50),                      # 11 プロファイル名称
+    ("data", 500),                     # 11 プロファイルデータ
+)
+
+# レジメン情報 〜 項目数情報 (プロファイル情報群の後ろに続く固定長部分)
+REGIMEN_SCHEMA = (
+    ("regimen_info", (                 # 05 レジメン情報
+        ("code", 8),                   # 07 レジメンコード
+        ("name", 50),                  # 07 レジメン名
+        ("course_count", 3),           # 07 コース数
+        ("drip_order", 4),             # 07 滴下順
+        ("start_date", 14),            # 07 レジメン適用開始日
+        ("body_info", (                # 07 レジメン適用時の身体情報
+            ("height", 11, 'float'),   # 09 身長
+            ("weight", 11, 'float'),   # 09 体重
+            ("bsa", 11, 'float'),      # 09 体表面積
+        )),
+    )),
+    ("item_count_info", (              # 05 項目数情報
+        ("item_count", 4, 'count'),    # 07 項目数
+    )),
+)
+
+# 項目情報 (1項目分。項目数だけ繰り返す)
+ITEM_SCHEMA = (
+    ("attribute", 3, 'enum'),           # 09 項目属性
+    ("code", 8),                       # 09 項目コード
+    ("linked_item_code", 8),           # 09 連結項目コード
+    ("name", 50),                      # 09 項目名称
+    ("quantity", 11, 'float'),         # 09 数量
+    ("unit_flag", 1, 'enum'),           # 09 選択単位フラグ
+    ("unit_code", 3),                  # 09 選択単位コード
+    ("unit_name", 4),                  # 09 選択単位名称
+    ("max_dose_flag", 1, 'enum'),       # 09 極量フラグ
+    ("item_row_date", 8),              # 09 項目行日付
+    ("item_row_time", 6),              # 09 項目行時間
+    ("code_group", (                   # 09 コードグループ
+        ("buppin_code", 9),            # 11 物品コード
+        ("jan_code", 13),              # 11 物品JANコード
+        ("iyakuhin_code", 12),         # 11 薬品コード(厚生省コード) / 薬価基準収載医薬品コード
+        ("hot_code", 13),              # 11 HOTコード
+        ("receden_code", 12),          # 11 レセプト電算コード
+        ("jlac10_code", 17),           # 11 JLAC10コード
+        ("yj_code", 20),               # 11 標準コード(YJコード)
+        ("logi_code", 20),             # 11 物流コード
+        ("order_kanri_no", 14),        # 11 オーダ管理番号
+        ("iji_kanri_no", 10),          # 11 医事管理番号
+    )),
+)
+
+def _compile_schema(schema):
+    """
+    レイアウト定義を解析用の部品に変換する。
+
+    Returns:
+        tuple: (struct.Struct, 項目数, 変換が必要な項目の (位置, 型) の並び, 組み立て関数)
+            組み立て関数はデコード済みの値のリストを受け取り、入れ子の辞書を返す。
+    """
+    fmt = []
+    conversions = []
+
+    def make_builder(entries):
+        # 各項目を (キー, 値の取り出し方) の組にする。
+        # 値は項目なら itemgetter(位置)、グループなら下位グループの組み立て関数で取り出す
+        getters = []
+        for name, spec, *kind in entries:
+            if isinstance(spec, tuple):
+                getters.append((name, make_builder(spec)))
+            else:
+                if kind and kind[0] != 'str':
+                    conversions.append((len(fmt), kind[0]))
+                getters.append((name, itemgetter(len(fmt))))
+                fmt.append(f"{spec}s")
+
+        def build(v):
+            return {name: get(v) for name, get in getters}
+        return build
+
+    builder = make_builder(schema)
+    return struct.Struct("<" + "".join(fmt)), len(fmt), tuple(conversions), builder
+
+def _field_offsets(schema, base=0):
+    """
+    レイアウト定義から各項目の位置を求める。
+
+    Returns:
+        dict: "親.子" 形式のキーから (開始位置, 終了位置) への対応表
+    """
+    offsets = {}
+
+    def walk(entries, prefix, pos):
+        for name, spec, *_ in entries:
+            key = prefix + name
+            if isinstance(spec, tuple):
+                pos = walk(spec, key + ".", pos)
+            else:
+                offsets[key] = (pos, pos + spec)
+                pos += spec
+        return pos
+
+    walk(schema, "", base)
+    return offsets
+
+def _to_float(s):
+    """
+    実数項目を数値化する。空欄 (None) の場合は None のまま返す
+    (従来の np.nan と同様に JSON では null となる)
+    """
+    return float(s) if s is not None else None
+
+_COMMON_SECTION = _compile_schema(COMMON_SCHEMA)
+_CONTENT_HEAD_SECTION = _compile_schema(CONTENT_HEAD_SCHEMA)
+_PROFILE_SECTION = _compile_schema(PROFILE_SCHEMA)
+_REGIMEN_SECTION = _compile_schema(REGIMEN_SCHEMA)
+_ITEM_SECTION = _compile_schema(ITEM_SCHEMA)
+
+# 内容部先頭の各項目の電文先頭からの位置 (共通部の直後から始まる)
+_CONTENT_HEAD_OFFSETS = _field_offsets(CONTENT_HEAD_SCHEMA, base=_COMMON_SECTION[0].size)
 
 class TelegramParser:
     """
     注射オーダ依頼電文の電文を解析するパーサー。
     ファイルパス、またはバイト列(bytes)を受け取って解析する。
     """
-    def __init__(self, source, encoding='cp932'):
+    # 文書番号・版数の位置 (レイアウト定義から求める)
+    _DOC_ID_SPAN = _CONTENT_HEAD_OFFSETS['order_info.doc_id']
+    _VERSION_SPAN = _CONTENT_HEAD_OFFSETS['order_info.version']
+    # 共通部先頭の必須項目 (電文種別 II / レコード継続指示 E / 送信先システム HS / 発信元システム XX)
+    _REQUIRED_HEADER = b'IIEHSXX'
+
+    def __init__(self, source=None, encoding='cp932'):
         """
         Args:
-            source (str | bytes): 解析対象のファイルパス(str) または 電文バイト列(bytes)
+            source (str | bytes | None): 解析対象のファイルパス(str) または 電文バイト列(bytes)
+                None の場合は parse_bytes() / parse_path() で都度データを渡して再利用する
             encoding (str): エンコーディング (デフォルト: cp932)
         """
         self.encoding = encoding
@@ -24,245 +270,220 @@ class TelegramParser:
         elif isinstance(source, bytes):
             # バイト列の場合は直接データとして保持する
             self.raw_bytes = source
-        else:
+        elif source is not None:
             raise ValueError("source はファイルパス(str) または バイト列(bytes) である必要があります。")
 
-    def _slice(self, num_bytes):
+    def parse_bytes(self, raw_bytes):
+        """
+        バイト列を解析する。同じインスタンスを使い回して複数の電文を解析できる。
+
+        Args:
+            raw_bytes (bytes): 電文バイト列
+
+        Returns:
+            dict: 解析された電文データ。
+        """
+        self.filepath = None
+        self.raw_bytes = raw_bytes
+        try:
+            return self.parse()
+        finally:
+            # 解析後は電文データへの参照を保持しない
+            self.raw_bytes = b''
+
+    def parse_path(self, filepath):
+        """
+        ファイルを読み込んで解析する。同じインスタンスを使い回して複数の電文を解析できる。
+
+        Args:
+            filepath (str): 電文ファイルのパス
+
+        Returns:
+            dict: 解析された電文データ。
         """
-        現在のオフセットから指定バイト数をスライスし、オフセットを進める。
+        try:
+            return self.parse(filepath)
+        finally:
+            self.raw_bytes = b''
+
+    def parse_stream(self, filepaths):
         """
-        if self.offset + num_bytes > len(self.raw_bytes):
-            raise ValueError(f"データが不足しています。{num_bytes} バイトを読み取ろうとしましたが、"
-                             f"オフセット {self.offset} でデータが終了しました。")
-        data_slice = self.raw_bytes[self.offset:self.offset + num_bytes]
-        self.offset += num_bytes
-        return data_slice
+        複数の電文ファイルを順に解析し、1件ずつ返すジェネレーター。
+        解析中に次のファイルをバックグラウンドのスレッドで読み込み、I/O と解析を重ねる。
+
+        Args:
+            filepaths (Iterable[str]): 電文ファイルのパスの並び
+
+        Yields:
+            dict: 解析された電文データ (filepaths と同じ順序)。
+        """
+        paths = iter(filepaths)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            path = next(paths, None)
+            pending = executor.submit(_read_file, path) if path is not None else None
+            while pending is not None:
+                raw_bytes = pending.result()
+                # 現在のファイルを解析する前に、次のファイルの読み込みを開始しておく
+                path = next(paths, None)
+                pending = executor.submit(_read_file, path) if path is not None else None
+                yield self.parse_bytes(raw_bytes)
+
+    @classmethod
+    def parse_many(cls, filepaths, workers=None, encoding='cp932'):
+        """
+        複数の電文ファイルをプロセスプールで並列に解析する。
+
+        Args:
+            filepaths (Iterable[str]): 電文ファイルのパスの並び
+            workers (int | None): プロセス数 (None の場合は CPU 数)
+            encoding (str): エンコーディング (デフォルト: cp932)
+
+        Returns:
+            list: 解析された電文データのリスト (filepaths と同じ順序)。
+                いずれかのファイルで解析に失敗した場合はその例外を送出する。
+        """
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(partial(_parse_one, encoding=encoding), filepaths))
+
+    @classmethod
+    def peek_header(cls, raw_bytes, encoding='cp932'):
+        """
+        電文全体を解析せず、固定位置にある文書番号と版数だけを取り出す。
+        重複登録チェックを解析前に行うためのもの。
+
+        Args:
+            raw_bytes (bytes): 電文バイト列
+            encoding (str): エンコーディング (デフォルト: cp932)
+
+        Returns:
+            tuple: (doc_id, version)。取り出せない場合、または共通部先頭の必須項目が
+                電文形式を満たさない場合は (None, None)
+        """
+        doc_id_start, doc_id_end = cls._DOC_ID_SPAN
+        version_start, version_end = cls._VERSION_SPAN
+        if len(raw_bytes) < version_end:
+            return None, None
+        # 電文形式を満たさないデータは重複チェックの対象とせず、解析時の検証エラーに任せる
+        if raw_bytes[:len(cls._REQUIRED_HEADER)] != cls._REQUIRED_HEADER:
+            return None, None
+
+        doc_id = raw_bytes[doc_id_start:doc_id_end].decode(encoding, errors='replace').strip()
+        try:
+            version = int(raw_bytes[version_start:version_end])
+        except ValueError:
+            return None, None
+        return (doc_id or None), version
 
     def _decode(self, byte_slice):
         """
-        バイトスライスをデコードし、stripし、空の場合は np.nan を返す。
+        バイトスライスをデコードし、stripし、空の場合は None を返す。
         """
         # 不正なSHIFT-JIS文字があってもエラーにならないよう 'replace' を使用
         s = byte_slice.decode(self.encoding, errors='replace').strip()
-        # スペース埋めされている項目は np.nan を代入
-        return np.nan if not s else s
+        # スペース埋めされている項目は None を代入
+        return s or None
+
+    def _decode_fields(self, byte_fields):
+        """
+        複数のバイトスライスを1回のデコードでまとめて処理し、_decode と同じ規則の値のリストを返す。
+        固定長の各項目は文字の途中で区切られないため、区切り文字(NUL)で連結してデコードし、
+        デコード後に分割しても項目の境界は変わらない (NULはcp932の2バイト文字に現れない)。
+        """
+        parts = b'\0'.join(byte_fields).decode(self.encoding, errors='replace').split('\0')
+        if len(parts) != len(byte_fields):
+            # 項目内にNULが含まれる場合は項目ごとにデコードする
+            return [self._decode(b) for b in byte_fields]
+        # スペース埋めされている項目は None を代入
+        return [s or None for s in map(str.strip, parts)]
+
+    def _unpack_section(self, section):
+        """
+        固定長のセクションを struct で一括して切り出し、入れ子の辞書として返す。
+        """
+        return self._unpack_records(section, 1)[0]
 
-    def _slice_and_decode(self, num_bytes):
+    def _unpack_records(self, section, count):
         """
-        スライスとデコードを一度に行うヘルパー。
+        同じレイアウトが count 回繰り返されるブロックを struct.iter_unpack で一括して切り出し、
+        全項目をまとめてデコードした上で、1件ごとの辞書のリストとして返す。
+        データ長の確認はブロック全体に対して1回だけ行う。
         """
-        return self._decode(self._slice(num_bytes))
+        section_struct, field_count, conversions, builder = section
+        # 属性参照を減らすため、バッファとオフセットはローカル変数で扱う
+        buf = self.raw_bytes
+        offset = self.offset
+        size = section_struct.size * count
+        if offset + size > len(buf):
+            raise ValueError(f"データが不足しています。{size} バイトを読み取ろうとしましたが、"
+                             f"オフセット {offset} でデータが終了しました。")
+        block = buf[offset:offset + size]
+        self.offset = offset + size
+
+        values = self._decode_fields([v for record in section_struct.iter_unpack(block) for v in record])
+
+        if not conversions:
+            return [builder(values[start:start + field_count]) for start in range(0, len(values), field_count)]
+
+        records = []
+        append = records.append
+        intern = sys.intern
+        for start in range(0, len(values), field_count):
+            v = values[start:start + field_count]
+            for i, kind in conversions:
+                s = v[i]
+                if kind == 'int':
+                    if s is None:
+                        raise ValueError("必須の数値項目が空欄です。")
+                    v[i] = int(s)
+                elif kind == 'float':
+                    v[i] = _to_float(s)
+                elif kind == 'count':
+                    # 繰り返し数 (空欄の場合は 0)
+                    v[i] = int(s) if s is not None else 0
+                elif kind == 'enum' and s is not None:
+                    v[i] = intern(s)
+            append(builder(v))
+        return records
 
     def _parse_common_part(self):
         """共通部 (64バイト) を解析"""
-        common = {
-            "message_type": self._slice_and_decode(2),            # 05 電文種別
-            "record_continuation": self._slice_and_decode(1),     # 05 レコード継続指示
-            "destination_system_code": self._slice_and_decode(2), # 05 送信先システムコード
-            "source_system_code": self._slice_and_decode(2),      # 05 発信元システムコード
-        }
-        # --- 05 処理情報 ---
-        common["processing_info"] = {
-            "date": self._slice_and_decode(8), # 07 処理年月日
-            "time": self._slice_and_decode(6), # 07 処理時刻
-        }
-        common["client_name"] = self._slice_and_decode(8)      # 05 端末名
-        common["d_id"] = self._slice_and_decode(8)             # 05 利用者番号
-        common["processing_class"] = self._slice_and_decode(2) # 05 処理区分
-        common["response_type"] = self._slice_and_decode(2)    # 05 応答種別
-        common["message_length"] = self._slice_and_decode(6)   # 05 電文長
-        common["error_code"] = self._slice_and_decode(5)       # 05 エラーコード
-        common["reserve"] = self._slice_and_decode(12)         # 05 予備
-
-        return common
+        return self._unpack_section(_COMMON_SECTION)
 
     def _parse_content_part(self):
         """
         内容部 (可変長) を解析
         """
-        content = {}
-
-        # --- 05 患者情報 ---
-        content['patient_info'] = {
-            "id": self._slice_and_decode(10),           # 07 患者番号 / 患者ID
-            "kanji_name": self._slice_and_decode(30),   # 07 患者漢字氏名
-            "kana_name": self._slice_and_decode(60),    # 07 患者カナ氏名
-            "sex": self._slice_and_decode(1),           # 07 患者性別
-            "birthdate": self._slice_and_decode(8),     # 07 患者生年月日
-            "postal_code_1": self._slice_and_decode(3), # 07 郵便番号1
-            "postal_code_2": self._slice_and_decode(4), # 07 郵便番号2
-            "address": self._slice_and_decode(100),     # 07 患者住所
-            "phone_number": self._slice_and_decode(15), # 07 電話番号
-        }
-
-        # --- 05 入院情報 ---
-        content['inpatient_info'] = {
-            "status": self._slice_and_decode(1),    # 07 入外状態
-            "dept_code": self._slice_and_decode(3), # 07 入院診療科コード
-            "ward_code": self._slice_and_decode(3), # 07 入院中病棟コード
-            "room_code": self._slice_and_decode(5), # 07 入院中部屋コード
-            "bed_code": self._slice_and_decode(2),  # 07 入院中ベッドコード
-        }
-
-        # --- 05 オーダ情報 ---
-        order_info = {
-            "doc_type": self._slice_and_decode(1),       # 07 文書種別
-            "doc_id": self._slice_and_decode(30),        # 07 文書番号
-            "version": int(self._slice_and_decode(2)),   # 07 版数
-            "parent_doc_id": self._slice_and_decode(30), # 07 親文書番号
-            "number": self._slice_and_decode(8),         # 07 オーダ番号
-        }
-
-        # 07 関連オーダ番号情報
-        order_info['related_order_info'] = {
-                "date": self._slice_and_decode(8), # 09 関連オーダ作成日
-                "number": self._slice_and_decode(8),   # 09 関連オーダ番号
-        }
-        
-        # 07 実施日時 
-        order_info['jisshi_datetime'] = {
-            "date": self._slice_and_decode(8), # 09 実施日付
-            "time": self._slice_and_decode(6), # 09 実施時間
-        }
-
-        # 07 オーダ作成日 
-        order_info['sakusei_datetime'] = {
-            "date": self._slice_and_decode(8), # 09 オーダ日付
-            "time": self._slice_and_decode(6), # 09 オーダ時間
-        }
-        order_info['hikikaeken_no'] = self._slice_and_decode(8)          # 07 薬引換券番号
-        order_info['inpatient_status'] = self._slice_and_decode(1)       # 07 入外区分
-        order_info['hakkou_dept_code'] = self._slice_and_decode(3) # 07 オーダ発行診療科コード
-        order_info['hakkou_ward_code'] = self._slice_and_decode(3) # 07 オーダ発行病棟コード
-        order_info['denpyo_code'] = self._slice_and_decode(4)            # 07 伝票コード
-        order_info['denpyo_name'] = self._slice_and_decode(50)           # 07 伝票名称
-
-        # 07 依頼医情報 
-        order_info['doctor_info'] = {
-            "d_id": self._slice_and_decode(8),        # 09 依頼医番号
-            "kanji_name": self._slice_and_decode(20), # 09 依頼医名
-            "kana_name": self._slice_and_decode(40),  # 09 依頼医カナ名
-        }
-        # 07 代行利用者情報 
-        order_info['daikoh_info'] = {
-            "d_id": self._slice_and_decode(8),        # 09 代行利用者番号
-            "kanji_name": self._slice_and_decode(20), # 09 代行利用者名
-        }
-
-        # 07 麻薬施用者情報1
-        order_info['mayaku_shiyosha_1'] = {
-            "id": self._slice_and_decode(10),        # 09 麻薬施用者番号1
-            "start_date": self._slice_and_decode(8), # 09 開始日
-            "end_date": self._slice_and_decode(8),   # 09 終了日
-        }
-
-        # 07 麻薬施用者情報2
-        order_info['mayaku_shiyosha_2'] = {
-            "id": self._slice_and_decode(10),        # 09 麻薬施用者番号2
-            "start_date": self._slice_and_decode(8), # 09 開始日
-            "end_date": self._slice_and_decode(8),   # 09 終了日
-        }
-
-        content['order_info'] = order_info
-
-        # --- 05 患者プロファイル情報 ---
-        patient_profile = {}
-
-        # 07 身長
-        patient_profile['height'] = {
-            "value": float(self._slice_and_decode(11) or 0), # 09 身長値
-            "date": self._slice_and_decode(8),   # 09 身長計測日
-        }
-        # 07 体重
-        patient_profile['weight'] = {
-            "value": float(self._slice_and_decode(11) or 0), # 09 体重値
-            "date": self._slice_and_decode(8),   # 09 体重計測日
-        }
-        # 07 体表面積 body surface area
-        patient_profile['bsa'] = {
-            "value": float(self._slice_and_decode(11) or 0), # 09 体表面積値
-        }
-
-        # 07 プロファイル情報
-        profile_count_str = self._slice_and_decode(3) # 09 プロファイル数
-        profile_count = int(profile_count_str) if profile_count_str is not np.nan else 0 # 数値化
-        patient_profile['profile_info'] = {
-            "profile_count": profile_count
-        }
-
-        ## 09 プロファイル情報群 (可変長)
-        patient_profile['profile_info']['profile_group'] = []
-        for _ in range(profile_count):
-            patient_profile['profile_info']['profile_group'].append({
-                "code": self._slice_and_decode(10),  # 11 プロファイルコード
-                "name": self._slice_and_decode(50),  # 11 プロファイル名称
-                "data": self._slice_and_decode(500), # 11 プロファイルデータ
-            })
-
-        content['patient_profile'] = patient_profile
-
-        # --- 05 レジメン情報 ---
-        content['regimen_info'] = {
-            "code": self._slice_and_decode(8),         # 07 レジメンコード
-            "name": self._slice_and_decode(50),        # 07 レジメン名
-            "course_count": self._slice_and_decode(3), # 07 コース数
-            "drip_order": self._slice_and_decode(4),   # 07 滴下順
-            "start_date": self._slice_and_decode(14),  # 07 レジメン適用開始日
-            # 07 レジメン適用時の身体情報
-            "body_info": { 
-                "height": float(self._slice_and_decode(11) or 0), # 09 身長
-                "weight": float(self._slice_and_decode(11) or 0), # 09 体重
-                "bsa": float(self._slice_and_decode(11) or 0),    # 09 体表面積
-            }
-        }
+        # --- 05 患者情報 〜 05 患者プロファイル情報 (プロファイル数) ---
+        # 固定長部分は一括で切り出す
+        content = self._unpack_section(_CONTENT_HEAD_SECTION)
+        patient_profile = content['patient_profile']
+        profile_count = patient_profile['profile_info']['profile_count']
+
+        ## 09 プロファイル情報群 (可変長。全件を一括で切り出す)
+        patient_profile['profile_info']['profile_group'] = self._unpack_records(_PROFILE_SECTION, profile_count)
 
-        # --- 05 項目数情報 ---
-        item_count_str = self._slice_and_decode(4) # 07 項目数
-        item_count = int(item_count_str) if item_count_str is not np.nan else 0 # 数値化
-        content['item_count_info'] = {"item_count": item_count}
+        # --- 05 レジメン情報 〜 05 項目数情報 ---
+        content.update(self._unpack_section(_REGIMEN_SECTION))
+        item_count = content['item_count_info']['item_count']
 
         # --- 05 項目情報群 ---
         item_group = {} 
-        # 07 項目情報 (可変長)
-        item_group['item_info'] = []
-        for _ in range(item_count):
-            item = {
-                "attribute": self._slice_and_decode(3),         # 09 項目属性
-                "code": self._slice_and_decode(8),              # 09 項目コード
-                "linked_item_code": self._slice_and_decode(8),  # 09 連結項目コード
-                "name": self._slice_and_decode(50),             # 09 項目名称
-                "quantity": float(self._slice_and_decode(11) or 0),  # 09 数量
-                "unit_flag": self._slice_and_decode(1),         # 09 選択単位フラグ
-                "unit_code": self._slice_and_decode(3),         # 09 選択単位コード
-                "unit_name": self._slice_and_decode(4),         # 09 選択単位名称
-                "max_dose_flag": self._slice_and_decode(1),     # 09 極量フラグ
-                "item_row_date": self._slice_and_decode(8),     # 09 項目行日付
-                "item_row_time": self._slice_and_decode(6),     # 09 項目行時間
-                ## 09 コードグループ
-                "code_group": {
-                    "buppin_code": self._slice_and_decode(9),     # 11 物品コード
-                    "jan_code": self._slice_and_decode(13),       # 11 物品JANコード
-                    "iyakuhin_code": self._slice_and_decode(12),  # 11 薬品コード(厚生省コード) / 薬価基準収載医薬品コード
-                    "hot_code": self._slice_and_decode(13),       # 11 HOTコード
-                    "receden_code": self._slice_and_decode(12),   # 11 レセプト電算コード
-                    "jlac10_code": self._slice_and_decode(17),    # 11 JLAC10コード
-                    "yj_code": self._slice_and_decode(20),        # 11 標準コード(YJコード)
-                    "logi_code": self._slice_and_decode(20),      # 11 物流コード
-                    "order_kanri_no": self._slice_and_decode(14), # 11 オーダ管理番号
-                    "iji_kanri_no": self._slice_and_decode(10),   # 11 医事管理番号
-                }
-            }
-            item_group['item_info'].append(item)
+        # 07 項目情報 (可変長。全項目を一括で切り出す)
+        item_group['item_info'] = self._unpack_records(_ITEM_SECTION, item_count)
 
         content['item_group'] = item_group
         return content
 
-    def parse(self):
+    def parse(self, filepath=None):
         """
         電文を解析を実行する。
         ファイルパスが指定されている場合はファイルを読み込み、
         バイト列が直接渡されている場合はそれを使用する。
 
+        Args:
+            filepath (str | None): 解析するファイルのパス。指定した場合はコンストラクタで渡した
+                入力の代わりにこのファイルを解析するため、同じインスタンスで複数のファイルを解析できる。
+
         Returns:
             dict: 解析された電文データ。
 
@@ -270,17 +491,20 @@ class TelegramParser:
             FileNotFoundError: ファイルが見つからない場合。
             ValueError: 解析エラーや検証エラーが発生した場合。
         """
+        if filepath is not None:
+            self.filepath = filepath
+            self.raw_bytes = b''
+
         # ファイルパス指定 かつ まだ読み込んでいない場合のみ読み込む
+        # ファイルは bytes にコピーせず mmap で割り当て、解析後に閉じる
+        mapped = None
         if self.filepath and not self.raw_bytes:
-            try:
-                with open(self.filepath, 'rb') as f:
-                    self.raw_bytes = f.read()
-            except FileNotFoundError:
-                print(f"エラー: ファイルが見つかりません: {self.filepath}")
-                raise
-            except Exception as e:
-                print(f"エラー: ファイルを読み込めません: {e}")
-                raise
+            # 読み込みエラー (FileNotFoundError など) はそのまま呼び出し元に送出する
+            with open(self.filepath, 'rb') as f:
+                # 空ファイルは mmap できないため、サイズが 0 の場合は空データとして扱う
+                if os.fstat(f.fileno()).st_size > 0:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    self.raw_bytes = mapped
 
         if not self.raw_bytes:
             raise ValueError("解析対象のデータが空です。")
@@ -310,7 +534,7 @@ class TelegramParser:
             if self.offset < len(self.raw_bytes):
                 remaining = len(self.raw_bytes) - self.offset
                 # API経由などの場合、ログに出すだけにする
-                # print(f"警告: {remaining} バイトがデータの終端に残っています。")
+                logger.debug("%d バイトがデータの終端に残っています。", remaining)
 
             # --- 5. 結合 ---
             full_telegram = {
@@ -320,6 +544,27 @@ class TelegramParser:
 
             return full_telegram
 
-        except Exception as e:
-            print(f"解析エラー: オフセット {self.offset} 付近で問題が発生しました。")
-            raise
\ No newline at end of file
+        except ValueError as e:
+            # ログ出力は呼び出し元に任せ、発生位置をメッセージに含めて送出する
+            raise ValueError(f"解析エラー: オフセット {self.offset} 付近で問題が発生しました。{e}") from e
+        finally:
+            if mapped is not None:
+                # 閉じた mmap への参照を残さない
+                self.raw_bytes = b''
+                mapped.close()
+
+def _read_file(filepath):
+    """parse_stream の先読み用に、ファイル全体をバイト列として読み込む"""
+    with open(filepath, 'rb') as f:
+        return f.read()
+
+def _parse_one(filepath, encoding='cp932'):
+    """
+    parse_many のワーカープロセスで1ファイルを解析する (プロセス間で渡せるようモジュール関数にしている)。
+    ワーカー毎にパーサーを1つ作り、同じプロセス内のファイルで使い回す。
+    """
+    global _worker_parser
+    if _worker_parser is None or _worker_parser.encoding != encoding:
+        _worker_parser = TelegramParser(encoding=encoding)
+    return _worker_parser.parse_path(filepath)
+
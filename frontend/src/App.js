@@ -8,6 +8,8 @@ function App() {
   const [selectedTelegram, setSelectedTelegram] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
+  // 一覧の次ページ取得用カーソル (次ページがない場合は null)
+  const [nextCursor, setNextCursor] = useState(null);
 
   // 検索用State
   const [searchParams, setSearchParams] = useState({ number: '', version: '' });
@@ -20,11 +22,15 @@ function App() {
     fetchTelegrams();
   }, []);
 
-  // 電文一覧取得
-  const fetchTelegrams = async () => {
+  // 電文一覧取得 (cursor を指定した場合は続きのページを取得して末尾に追加する)
+  const fetchTelegrams = async (cursor = null) => {
     try {
-      const res = await axios.get('/api/telegrams');
-      setTelegrams(res.data);
+      const res = await axios.get('/api/telegrams', { params: cursor || {} });
+      setTelegrams(prev => cursor ? [...prev, ...res.data] : res.data);
+
+      // 次ページのカーソルはレスポンスヘッダーで返される
+      const before = res.headers['x-next-before'];
+      setNextCursor(before ? { before, before_id: res.headers['x-next-before-id'] } : null);
     } catch (err) {
       console.error("Fetch error:", err);
       setError("データの取得に失敗しました。");
@@ -45,6 +51,8 @@ function App() {
       });
       const searchResults = res.data;
       setTelegrams(searchResults);
+      // 検索結果はページングしない
+      setNextCursor(null);
 
       // 検索結果判定
       if (searchResults.length > 0) {
@@ -244,6 +252,16 @@ function App() {
                 ))}
               </ul>
             )}
+            {nextCursor && (
+              <button
+                type="button"
+                onClick={() => fetchTelegrams(nextCursor)}
+                disabled={loading}
+                className="secondary-button"
+              >
+                さらに読み込む
+              </button>
+            )}
           </section>
 
           {/* 3. 右側: 詳細表示 */}